@@ -10,6 +10,7 @@ import os
 import signal
 from datetime import datetime, timedelta
 from enum import Enum
+from functools import cache
 from multiprocessing import shared_memory
 from builtins import memoryview
 from typing import Any, Dict, List
@@ -236,6 +237,23 @@ def _get_celery_command_index(celery_command: str, celery_tasks: List[CeleryTask
     return -1
 
 
+@cache
+def _get_sqs_client() -> SQSClient:
+    """
+    Retrieve the SQS client used for returning abandoned tasks to the queue.
+
+    Creating a boto3 client is expensive, as it involves loading the service model and
+    resolving the endpoint and credentials, so we create it once and reuse it.
+
+    :returns The SQS client.
+    """
+    return boto3.client(  # type: ignore
+        "sqs",
+        region_name=os.environ["AWS_REGION"],
+        config=BOTO_RETRY_CONFIGURATION,  # type: ignore
+    )
+
+
 def _cleanup_undead_process(process_id: int):
     """
     Cleanup the undead process.
@@ -543,11 +561,7 @@ class WorkerTaskMonitor:
             clean_celery_message_error_no_queue += 1
 
         else:
-            sqs: SQSClient = boto3.client(  # type: ignore
-                "sqs",
-                region_name=os.environ["AWS_REGION"],
-                config=BOTO_RETRY_CONFIGURATION,  # type: ignore
-            )
+            sqs = _get_sqs_client()
             try:
                 sqs.change_message_visibility(
                     QueueUrl=celery_queue_url,
@@ -3,6 +3,7 @@
 import json
 import logging
 import os
+from functools import cache
 from operator import itemgetter
 from typing import Tuple
 
@@ -60,10 +61,14 @@ def get_db_credentials() -> Tuple[str, str]:
     return postgres_user, postgres_password
 
 
+@cache
 def get_db_connection_string() -> str:
     """
     Retrieve the connection string for communicating with metadata database.
 
+    The result is cached, since the environment variables it is built from don't change
+    during the lifetime of the container.
+
     :returns The connection string.
 
     :raises RuntimeError if the required environment variables are not set.
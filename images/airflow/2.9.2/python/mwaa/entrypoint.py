@@ -92,6 +92,14 @@ STARTUP_SCRIPT_MAX_EXECUTION_TIME = (
     timedelta(minutes=5) - STARTUP_SCRIPT_SIGTERM_PATIENCE_INTERVAL
 )
 USER_REQUIREMENTS_MAX_INSTALL_TIME = timedelta(minutes=9)
+# The Airflow commands run by a scheduler container, along with the names of their
+# loggers and their friendly names.
+SCHEDULER_COMPONENTS = [
+    ("scheduler", SCHEDULER_LOGGER_NAME, "scheduler"),
+    # Airflow has a dedicated logger for the DAG Processor Manager so we just use it.
+    ("dag-processor", "airflow.processor_manager", "dag-processor"),
+    ("triggerer", TRIGGERER_LOGGER_NAME, "triggerer"),
+]
 
 # Save the start time of the container. This is used later to with the sidecar
 # monitoring because we need to have a grace period before we start reporting timeouts
@@ -158,6 +166,24 @@ async def create_airflow_user(environ: dict[str, str]):
     )
 
 
+async def setup_airflow_db(environ: dict[str, str]):
+    """
+    Set up the Airflow database.
+
+    This initializes the Airflow database and, in testing mode, creates the webserver
+    user, which requires the database to be initialized first.
+
+    :param environ: A dictionary containing the environment variables.
+    """
+    await airflow_db_init(environ)
+    if os.environ.get("MWAA__CORE__AUTH_TYPE", "").lower() == "testing":
+        # In "simple" auth mode, we create an admin user "airflow" with password
+        # "airflow". We use this to make the Docker Compose setup easy to use without
+        # having to create a user manually. Needless to say, this shouldn't be used in
+        # production environments.
+        await create_airflow_user(environ)
+
+
 @with_db_lock(1357)
 def create_queue() -> None:
     """
@@ -173,23 +199,33 @@ def create_queue() -> None:
     endpoint = os.environ.get("MWAA__SQS__CUSTOM_ENDPOINT")
     sqs = boto3.client("sqs", endpoint_url=endpoint)  # type: ignore
     try:
-        # Try to get the queue URL to check if it exists
-        sqs.get_queue_url(QueueName=queue_name)["QueueUrl"]  # type: ignore
-        logger.info(f"Queue {queue_name} already exists.")
+        # CreateQueue is idempotent: if the queue already exists, it simply returns its
+        # URL, so there is no need to check for its existence first.
+        response = sqs.create_queue(QueueName=queue_name)  # type: ignore
+        queue_url = response["QueueUrl"]  # type: ignore
+        logger.info(f"Queue created or already exists: {queue_url}")
     except ClientError as e:
-        # If the queue does not exist, create it
-        if (
-            e.response.get("Error", {}).get("Message")  # type: ignore
-            == "The specified queue does not exist."
+        # The queue exists, but with different attributes from what we requested.
+        if e.response.get("Error", {}).get("Code") in (  # type: ignore
+            "QueueAlreadyExists",
+            "QueueNameExists",
         ):
-            response = sqs.create_queue(QueueName=queue_name)  # type: ignore
-            queue_url = response["QueueUrl"]  # type: ignore
-            logger.info(f"Queue created: {queue_url}")
+            logger.info(f"Queue {queue_name} already exists.")
         else:
             # If there is a different error, raise it
             raise e
 
 
+def _requirements_is_empty(requirements_file: str):
+    with open(requirements_file, "r") as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                return False
+
+    return True
+
+
 def _requirements_has_constraints(requirements_file: str):
     with open(requirements_file, "r") as file:
         for line in file:
@@ -218,13 +254,20 @@ async def install_user_requirements(cmd: str, environ: dict[str, str]):
     requirements_file = environ.get("MWAA__CORE__REQUIREMENTS_PATH")
     logger.info(f"MWAA__CORE__REQUIREMENTS_PATH = {requirements_file}")
     if requirements_file and os.path.isfile(requirements_file):
+        if _requirements_is_empty(requirements_file):
+            # Avoid the cost of starting pip when there is nothing to install.
+            logger.info(
+                f"{requirements_file} is empty. No user requirements to install."
+            )
+            return
+
         logger.info(f"Installing user requirements from {requirements_file}...")
 
         subprocess_logger = CompositeLogger(
             "requirements_composite_logging",  # name can be anything unused.
-            # We use a set to avoid double logging to console if the user doesn't
-            # use CloudWatch for logging.
-            *set(
+            # We deduplicate the loggers, keeping their order, to avoid double logging
+            # to console if the user doesn't use CloudWatch for logging.
+            *dict.fromkeys(
                 [
                     logging.getLogger(MWAA_LOGGERS.get(f"{cmd}_requirements")),
                     logger,
@@ -283,7 +326,7 @@ def execute_startup_script(cmd: str, environ: Dict[str, str]) -> Dict[str, str]:
     if os.path.isfile(startup_script_path):
         logger.info("Executing customer startup script.")
 
-        start_time = time.time()  # Capture start time
+        start_time = time.monotonic()  # Capture start time
         startup_script_process = Subprocess(
             cmd=["/bin/bash", EXECUTE_USER_STARTUP_SCRIPT_PATH],
             env=environ,
@@ -295,7 +338,7 @@ def execute_startup_script(cmd: str, environ: Dict[str, str]) -> Dict[str, str]:
             sigterm_patience_interval=STARTUP_SCRIPT_SIGTERM_PATIENCE_INTERVAL,
         )
         startup_script_process.start()
-        end_time = time.time()
+        end_time = time.monotonic()
         duration = end_time - start_time
         PROCESS_LOGGER.info(f"Startup script execution time: {duration:.2f} seconds.")
 
@@ -312,17 +355,12 @@ def execute_startup_script(cmd: str, environ: Dict[str, str]) -> Dict[str, str]:
         verification_process.start()
 
         customer_env_vars_path = "/tmp/customer_env_vars.json"
-        if os.path.isfile(customer_env_vars_path):
-            try:
-                with open(customer_env_vars_path, "r") as f:
-                    customer_env_dict = json.load(f)
-                logger.info("Successfully read the customer's environment variables.")
-                return customer_env_dict
-            except Exception as e:
-                logger.error(f"Error reading the customer's environment variables: {e}")
-                return {}
-
-        else:
+        try:
+            with open(customer_env_vars_path, "r") as f:
+                customer_env_dict = json.load(f)
+            logger.info("Successfully read the customer's environment variables.")
+            return customer_env_dict
+        except FileNotFoundError:
             logger.error(
                 "An unexpected error occurred: the file containing the customer-defined "
                 "environment variables could not be located. If the customer's startup "
@@ -330,6 +368,9 @@ def execute_startup_script(cmd: str, environ: Dict[str, str]) -> Dict[str, str]:
                 "those variables won't be exported to the Airflow tasks."
             )
             return {}
+        except Exception as e:
+            logger.error(f"Error reading the customer's environment variables: {e}")
+            return {}
 
     else:
         logger.info(f"No startup script found at {startup_script_path}.")
@@ -354,18 +395,19 @@ def export_env_variables(environ: dict[str, str]):
     bashrc_path = os.path.join(home_dir, ".bashrc")
     bash_profile_path = os.path.join(home_dir, ".bash_profile")
 
-    # Environment variables to append
-    env_vars_to_append = [
+    # Environment variables to append. We format them into a single string so that
+    # each file is appended to with a single write.
+    env_vars_to_append = "".join(
         f"export {key}={shlex.quote(value)}\n" for key, value in environ.items()
-    ]
+    )
 
     # Append to .bashrc
     with open(bashrc_path, "a") as bashrc:
-        bashrc.writelines(env_vars_to_append)
+        bashrc.write(env_vars_to_append)
 
     # Append to .bash_profile
     with open(bash_profile_path, "a") as bash_profile:
-        bash_profile.writelines(env_vars_to_append)
+        bash_profile.write(env_vars_to_append)
 
 
 def create_airflow_subprocess(
@@ -597,13 +639,7 @@ def run_airflow_command(cmd: str, environ: Dict[str, str]):
                     friendly_name=friendly_name,
                     conditions=conditions if airflow_cmd == "scheduler" else [],
                 )
-                for airflow_cmd, logger_name, friendly_name in [
-                    ("scheduler", SCHEDULER_LOGGER_NAME, "scheduler"),
-                    # Airflow has a dedicated logger for the DAG Processor Manager
-                    # So we just use it
-                    ("dag-processor", "airflow.processor_manager", "dag-processor"),
-                    ("triggerer", TRIGGERER_LOGGER_NAME, "triggerer"),
-                ]
+                for airflow_cmd, logger_name, friendly_name in SCHEDULER_COMPONENTS
             ]
             # Schedulers, triggers, and DAG processors are all essential processes and
             # if any fails, we want to exit the container and let it restart.
@@ -658,41 +694,38 @@ async def main() -> None:
     mwaa_opinionated_airflow_environ = get_opinionated_environ()
     user_airflow_config = get_user_airflow_config()
 
-    startup_script_environ = execute_startup_script(
-        command,
-        {
-            **os.environ,
-            **mwaa_opinionated_airflow_config,
-            **mwaa_opinionated_airflow_environ,
-            **user_airflow_config,
-            **mwaa_essential_airflow_environ,
-            **mwaa_essential_airflow_config,
-        },
+    # The environment variables are built with in-place updates, in increasing order
+    # of priority, to avoid copying them into a new dictionary at every step.
+    startup_script_environ = dict(os.environ)
+    startup_script_environ.update(mwaa_opinionated_airflow_config)
+    startup_script_environ.update(mwaa_opinionated_airflow_environ)
+    startup_script_environ.update(user_airflow_config)
+    startup_script_environ.update(mwaa_essential_airflow_environ)
+    startup_script_environ.update(mwaa_essential_airflow_config)
+    customer_environ = execute_startup_script(command, startup_script_environ)
+
+    environ = dict(os.environ)
+    # Custom configuration and environment variables that we think are good, but
+    # allow the user to override.
+    environ.update(mwaa_opinionated_airflow_config)
+    environ.update(mwaa_opinionated_airflow_environ)
+    # What the user defined in the startup script.
+    environ.update(customer_environ)
+    # What the user passed via Airflow config secrets (specified by the
+    # MWAA__CORE__CUSTOM_AIRFLOW_CONFIGS environment variable.)
+    environ.update(user_airflow_config)
+    # The MWAA__x__y environment variables that are passed to the container are
+    # considered protected environment variables that cannot be overridden at
+    # runtime to avoid breaking the functionality of the container.
+    environ.update(
+        (key, value)
+        for (key, value) in os.environ.items()
+        if _is_protected_os_environ(key)
     )
-    environ = {
-        **os.environ,
-        # Custom configuration and environment variables that we think are good, but
-        # allow the user to override.
-        **mwaa_opinionated_airflow_config,
-        **mwaa_opinionated_airflow_environ,
-        # What the user defined in the startup script.
-        **startup_script_environ,
-        # What the user passed via Airflow config secrets (specified by the
-        # MWAA__CORE__CUSTOM_AIRFLOW_CONFIGS environment variable.)
-        **user_airflow_config,
-        # The MWAA__x__y environment variables that are passed to the container are
-        # considered protected environment variables that cannot be overridden at
-        # runtime to avoid breaking the functionality of the container.
-        **{
-            key: value
-            for (key, value) in os.environ.items()
-            if _is_protected_os_environ(key)
-        },
-        # Essential variables that our setup will not function properly without, hence
-        # it always has the highest priority.
-        **mwaa_essential_airflow_config,
-        **mwaa_essential_airflow_environ,
-    }
+    # Essential variables that our setup will not function properly without, hence
+    # it always has the highest priority.
+    environ.update(mwaa_essential_airflow_config)
+    environ.update(mwaa_essential_airflow_environ)
 
     # IMPORTANT NOTE: The level for this should stay "DEBUG" to avoid logging customer
     # custom environment variables, which potentially contains sensitive credentials,
@@ -700,20 +733,22 @@ async def main() -> None:
     # being captured and sent to the service hosting.
     logger.debug(f"Environment variables: %s", environ)
 
-    await airflow_db_init(environ)
-    if os.environ.get("MWAA__CORE__AUTH_TYPE", "").lower() == "testing":
-        # In "simple" auth mode, we create an admin user "airflow" with password
-        # "airflow". We use this to make the Docker Compose setup easy to use without
-        # having to create a user manually. Needless to say, this shouldn't be used in
-        # production environments.
-        await create_airflow_user(environ)
-    create_queue()
-    await install_user_requirements(command, environ)
-
+    # Creating the SQS queue doesn't depend on the database, so we do it in a separate
+    # thread while the database is being set up. Notice that the thread needs to be
+    # scheduled first, as taking the database lock blocks the event loop.
+    await asyncio.gather(
+        asyncio.to_thread(create_queue),
+        setup_airflow_db(environ),
+    )
     # Export the environment variables to .bashrc and .bash_profile to enable
     # users to run a shell on the container and have the necessary environment
-    # variables set for using airflow CLI.
-    export_env_variables(environ)
+    # variables set for using airflow CLI. This is done in a separate thread while
+    # the user requirements are being installed. Notice that the thread needs to be
+    # scheduled first, as installing the requirements blocks the event loop.
+    await asyncio.gather(
+        asyncio.to_thread(export_env_variables, environ),
+        install_user_requirements(command, environ),
+    )
 
     match command:
         case "shell":
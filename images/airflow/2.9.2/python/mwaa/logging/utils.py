@@ -1,11 +1,12 @@
 """A module containing various utility functions related to logging."""
 
 # Python imports
-from functools import wraps
+from functools import cache, wraps
 from typing import Callable, Any, TypeVar
 import time
 
 
+@cache
 def parse_arn(log_group_arn: str):
     """
     Extract the log group and region name from a log group ARN.
@@ -15,7 +16,8 @@ def parse_arn(log_group_arn: str):
     :return: A tuple containing the log group name and the region name.
     """
     try:
-        split_arn = log_group_arn.split(":")
+        # We only need the first 7 fields, so we don't split the rest of the ARN.
+        split_arn = log_group_arn.split(":", 7)
         log_group = split_arn[6]
         region_name = split_arn[3] if split_arn[3] else None
 
@@ -58,23 +60,27 @@ def throttle(
     """
 
     def decorator(func: F) -> F:
-        last_called_global = [0.0]
+        # We use a monotonic clock in integer nanoseconds so throttling isn't affected
+        # by changes to the system clock.
+        interval_ns = int(seconds * 1e9)
+        last_called_global = 0
 
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
+            nonlocal last_called_global
             if instance_level_throttling:
                 self = args[0]
                 if not hasattr(self, "_last_called"):
                     setattr(self, "_last_called", {})
-                last_called = self._last_called.get(func.__name__, 0.0)
+                last_called = self._last_called.get(func.__name__, 0)
             else:
-                last_called = last_called_global[0]
+                last_called = last_called_global
 
-            current_time = time.time()
+            current_time = time.monotonic_ns()
             elapsed = current_time - last_called
-            if elapsed < seconds:
-                wait_time = seconds - elapsed
+            if last_called and elapsed < interval_ns:
                 if log_throttling_msg:
+                    wait_time = (interval_ns - elapsed) / 1e9
                     print(
                         f"Throttling {func.__name__} for {wait_time:.2f} more seconds."
                     )
@@ -84,7 +90,7 @@ def throttle(
                     self = args[0]
                     self._last_called[func.__name__] = current_time
                 else:
-                    last_called_global[0] = current_time
+                    last_called_global = current_time
                 return func(*args, **kwargs)
 
         return wrapper  # type: ignore
@@ -15,8 +15,8 @@ class ProcessStatus(Enum):
     - FINISHED_WITH_LOG_READ: The process has finished but a log was recently read,
       meaning there are potentially more logs that need to be read.
     - RUNNING_WITH_NO_LOG_READ: The process is running but no log was read in the latest
-      attempt to read logs, thus a sleep is required before attempting to read more
-      logs to avoid spiking the CPU.
+      attempt to read logs, thus we should wait for more logs to be written before
+      attempting to read them to avoid spiking the CPU.
     - RUNNING_WITH_LOG_READ: The process is running and a log was read in the latest
       attempt, thus we should continue trying to read more logs to avoid delaying
       logs publishing.
@@ -328,7 +328,7 @@ class TimeoutCondition(ProcessCondition):
 
         Here, we set the `start_time` field to save the time the process started.
         """
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
 
     def _check(self, process_status: ProcessStatus) -> ProcessConditionResponse:
         """
@@ -336,9 +336,9 @@ class TimeoutCondition(ProcessCondition):
 
         :returns A ProcessConditionResponse containing data about the response.
         """
-        if not self.start_time:
+        if self.start_time is None:
             raise RuntimeError("TimeoutCondition has not been initialized")
-        running_time_ms = (time.time() - self.start_time) * 1000
+        running_time_ms = (time.monotonic() - self.start_time) * 1000
         timeout_ms = self.timeout.total_seconds() * 1000
         if running_time_ms < timeout_ms:
             return ProcessConditionResponse(condition=self, successful=True)
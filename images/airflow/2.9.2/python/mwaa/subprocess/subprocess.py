@@ -8,22 +8,27 @@ helps support CloudWatch Logs integration.
 """
 
 # Python imports
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import cache
 from subprocess import Popen
 from types import TracebackType
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set
 import atexit
+import codecs
 import fcntl
 import logging
 import os
+import selectors
 import signal
 import subprocess
 import sys
+import threading
 import time
+import weakref
 
 # Our imports
 from mwaa.logging.loggers import CompositeLogger
-from mwaa.logging.utils import throttle
 from mwaa.subprocess import ProcessStatus
 from mwaa.subprocess.conditions import ProcessCondition, ProcessConditionResponse
 
@@ -32,6 +37,23 @@ from mwaa.subprocess.conditions import ProcessCondition, ProcessConditionRespons
 # from us before we forcefully terminate the process with a SIGKILL.
 _SIGTERM_DEFAULT_PATIENCE_INTERVAL = timedelta(seconds=90)
 
+# The interval between two consecutive evaluations of the conditions of a process, so we
+# don't make excessive calls to process conditions.
+_CONDITIONS_CHECK_INTERVAL = timedelta(seconds=60)
+
+# The maximum number of bytes we read from the output of a process at once. This is
+# the default capacity of a pipe on Linux, so a single read can drain a full pipe.
+_OUTPUT_READ_CHUNK_SIZE = 64 * 1024
+
+# The capacity we request for the pipe the output of a process is written to. When the
+# pipe is full, the process blocks on writing its logs until we read them, so a bigger
+# pipe gives us more leeway when the execution loop is busy, e.g. checking conditions.
+# The default maximum allowed by Linux (see /proc/sys/fs/pipe-max-size) is 1 MiB.
+_OUTPUT_PIPE_SIZE = 1024 * 1024
+
+# The maximum time run_subprocesses() goes without iterating over all processes.
+_FULL_SWEEP_INTERVAL_SECS = 1
+
 
 module_logger = logging.getLogger(__name__)
 
@@ -43,7 +65,7 @@ class Subprocess:
         self,
         *,
         cmd: List[str],
-        env: Dict[str, str] = {**os.environ},
+        env: Dict[str, str] | None = None,
         logger: logging.Logger = module_logger,
         friendly_name: str | None = None,
         conditions: List[ProcessCondition] = [],
@@ -53,7 +75,8 @@ class Subprocess:
         Initialize the Subprocess object.
 
         :param cmd: the command to run.
-        :param env: A dictionary containing the environment variables to pass.
+        :param env: A dictionary containing the environment variables to pass. If not
+          specified, the process inherits the environment of the current process.
         :param logger: The logger object to use to publish logs coming from the process.
         :param timeout: If specified, the process will be terminated if it takes more
           time than what is specified here.
@@ -70,18 +93,36 @@ class Subprocess:
         # of the process and the logger of this Python module. This is useful in case
         # some messages are useful to both, the customer (typically the customer's
         # CloudWatch) and the service (Fargate, i.e. the service's CloudWatch).
-        self.dual_logger = CompositeLogger(
-            "process_module_dual_logger",  # name can be anything unused.
-            # We use a set to avoid double logging using the module logger if the user
-            # doesn't pass a logger.
-            *set([self.process_logger, module_logger]),
-        )
+        self.dual_logger = _get_dual_logger(self.process_logger)
         self.friendly_name = friendly_name
         self.conditions = conditions
         self.sigterm_patience_interval = sigterm_patience_interval
+        self._sigterm_patience_interval_secs = sigterm_patience_interval.total_seconds()
 
         self.start_time: float | None = None
         self.process: Popen[Any] | None = None
+        # A file descriptor referring to the process, which becomes readable when the
+        # process exits. This allows waiting for the exit of the process along with its
+        # output. It is None if not supported by the OS (requires Linux 5.3+.)
+        self._pidfd: int | None = None
+        # The selectors the process is currently registered with. See register().
+        self._selectors: List[selectors.BaseSelector] = []
+
+        # The conditions are evaluated periodically in a background thread, so slow
+        # conditions don't block reading the output of the process. The execution loop
+        # only reads the failed conditions found by the latest evaluation, or the error
+        # raised by it, which it re-raises.
+        self._failed_conditions: List[ProcessConditionResponse] = []
+        self._conditions_error: Exception | None = None
+        self._conditions_thread: threading.Thread | None = None
+        self._conditions_stop_event = threading.Event()
+        self._conditions_executor: ThreadPoolExecutor | None = None
+
+        # The output of the process is read in chunks which don't necessarily end at a
+        # line or even a character boundary, so we use an incremental decoder and keep
+        # the trailing incomplete line until the rest of it is read.
+        self._output_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_output_line = ""
 
     def __str__(self):
         """
@@ -142,17 +183,14 @@ class Subprocess:
             self.process = self._start_process()
 
             # Stop the process at exit.
-            atexit.register(self.close)
+            _open_subprocesses.add(self)
 
             self.process_status = ProcessStatus.RUNNING_WITH_NO_LOG_READ
 
+            self._start_checking_conditions()
+
             if auto_enter_execution_loop:
-                while self.execution_loop_iter():
-                    if self.process_status == ProcessStatus.RUNNING_WITH_NO_LOG_READ:
-                        # There are no pending logs in the process, so we sleep for a while
-                        # to avoid getting into a continuous execution that spikes the CPU
-                        # and impacts the Airflow process.
-                        time.sleep(1)
+                self._enter_execution_loop()
         except Exception as ex:
             module_logger.fatal(
                 "Unexpected error occurred while trying to start a process "
@@ -163,26 +201,133 @@ class Subprocess:
             # TODO Create a handler that can be used to hook the code that gracefully
             # shutdowns the worker.
 
+    def _enter_execution_loop(self):
+        with selectors.DefaultSelector() as selector:
+            self.register(selector)
+            try:
+                while self.execution_loop_iter():
+                    if self.process_status == ProcessStatus.RUNNING_WITH_NO_LOG_READ:
+                        # There are no pending logs in the process, so we block until
+                        # the process writes something or exits (or a second passes) to
+                        # avoid getting into a continuous execution that spikes the CPU
+                        # and impacts the Airflow process.
+                        selector.select(timeout=1)
+            finally:
+                self.unregister(selector)
+
     def stop(self):
         """Stop the subprocess."""
+        self._stop_checking_conditions()
         if self.process:
             module_logger.info(f"Stopping process {self}.")
             self._kill(self.process)
             self.process = None
+        self._close_pidfd()
 
     def close(self):
         """
         Close the subprocess.
         """
+        _open_subprocesses.discard(self)
         # Stop the process if not already stopped.
         self.stop()
         for condition in self.conditions:
             condition.close()
 
-    @throttle(60)  # so we don't make excessive calls to process conditions
+    def register(self, selector: selectors.BaseSelector):
+        """
+        Register the process with the given selector.
+
+        Once registered, the selector reports the process as ready whenever the process
+        writes output or exits. The key data is set to this object. The process keeps
+        track of the selectors it is registered with, so it can stop waiting on its
+        output once the output is closed. Hence, call unregister() before closing the
+        selector.
+
+        :param selector: The selector to register the process with.
+        """
+        for fd in self._get_waitable_fds():
+            selector.register(fd, selectors.EVENT_READ, self)
+        self._selectors.append(selector)
+
+    def unregister(self, selector: selectors.BaseSelector):
+        """
+        Unregister the process from the given selector.
+
+        :param selector: The selector the process was registered with.
+        """
+        for key in list(selector.get_map().values()):
+            if key.data is self:
+                selector.unregister(key.fileobj)
+        if selector in self._selectors:
+            self._selectors.remove(selector)
+
+    @property
+    def conditions_failed(self) -> bool:
+        """Whether the latest evaluation of the process conditions failed or raised."""
+        return bool(self._failed_conditions) or self._conditions_error is not None
+
+    def _get_waitable_fds(self) -> List[int]:
+        fds: List[int] = []
+        if self.process and self.process.stdout and not self.process.stdout.closed:
+            fds.append(self.process.stdout.fileno())
+        if self._pidfd is not None:
+            fds.append(self._pidfd)
+        return fds
+
+    def _start_checking_conditions(self):
+        if not self.conditions:
+            return
+        self._conditions_stop_event.clear()
+        if len(self.conditions) > 1:
+            # Conditions might do I/O, e.g. connecting to the database, so we evaluate
+            # them concurrently rather than waiting for each of them in turn.
+            self._conditions_executor = ThreadPoolExecutor(
+                max_workers=len(self.conditions),
+                thread_name_prefix=f"{self.friendly_name or self.cmd[0]}_condition",
+            )
+        self._conditions_thread = threading.Thread(
+            target=self._check_process_conditions_periodically,
+            name=f"{self.friendly_name or self.cmd[0]}_conditions",
+            daemon=True,
+        )
+        self._conditions_thread.start()
+
+    def _stop_checking_conditions(self):
+        self._conditions_stop_event.set()
+        if self._conditions_thread:
+            self._conditions_thread.join()
+            self._conditions_thread = None
+        if self._conditions_executor:
+            self._conditions_executor.shutdown()
+            self._conditions_executor = None
+
+    def _check_process_conditions_periodically(self):
+        interval_secs = _CONDITIONS_CHECK_INTERVAL.total_seconds()
+        while not self._conditions_stop_event.is_set():
+            try:
+                failed_conditions = self._check_process_conditions()
+            except Exception as ex:
+                # The execution loop will re-raise the error, so we stop checking.
+                self._conditions_error = ex
+                return
+            if failed_conditions:
+                # The execution loop will terminate the process, so we stop checking.
+                self._failed_conditions = failed_conditions
+                return
+            self._conditions_stop_event.wait(interval_secs)
+
     def _check_process_conditions(self) -> List[ProcessConditionResponse]:
         # Evaluate all conditions
-        checked_conditions = [c.check(self.process_status) for c in self.conditions]
+        process_status = self.process_status
+        if self._conditions_executor:
+            futures = [
+                self._conditions_executor.submit(c.check, process_status)
+                for c in self.conditions
+            ]
+            checked_conditions = [f.result() for f in futures]
+        else:
+            checked_conditions = [c.check(process_status) for c in self.conditions]
 
         # Filter out the unsuccessful conditions
         failed_conditions = [c for c in checked_conditions if not c.successful]
@@ -211,15 +356,21 @@ class Subprocess:
 
         self.process_status = self._capture_output_line_from_process(self.process)
 
-        # Filter out the unsuccessful conditions
-        failed_conditions = self._check_process_conditions()
+        if self._conditions_error is not None:
+            # Checking the conditions raised an error in the background thread. We raise
+            # it here, so it reaches the caller as if the conditions were checked here.
+            raise self._conditions_error
+
+        # Get the conditions that failed in the latest evaluation, if any.
+        failed_conditions = self._failed_conditions
 
         if failed_conditions:
+            reasons = "\n".join(f" - {c.message}" for c in failed_conditions)
             module_logger.error(
                 f"""
 {self} is being stopped due to the following:
 
-{os.linesep.join([' - ' + c.message for c in failed_conditions])}
+{reasons}
 
 A SIGTERM followed potentially by a SIGKILL will be sent to terminate the process.
             """.strip()
@@ -227,24 +378,43 @@ A SIGTERM followed potentially by a SIGKILL will be sent to terminate the proces
             self._kill(self.process)
             self.process_status = ProcessStatus.FINISHED_WITH_NO_MORE_LOGS
 
-        return self.process_status != ProcessStatus.FINISHED_WITH_NO_MORE_LOGS
+        if self.process_status == ProcessStatus.FINISHED_WITH_NO_MORE_LOGS:
+            self._stop_checking_conditions()
+            self._close_pidfd()
+            return False
+        return True
 
     def _start_process(self) -> Popen[Any]:
         module_logger.info(f"Starting new subprocess for command '{self.cmd}'...")
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
+        # Avoid passing `preexec_fn`, `user`, `group`, or `extra_groups` here: without
+        # them, CPython spawns the child using vfork() rather than fork(), which avoids
+        # copying the page tables of this (potentially big) process.
         process = subprocess.Popen(
             self.cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,  # Send to stdout so we can see it in the logs
+            # The output is read straight from the file descriptor with os.read(), so
+            # there is no need for a buffered reader on top of it.
+            bufsize=0,
             start_new_session=True,
             env=self.env,
         )
 
+        try:
+            self._pidfd = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):
+            self._pidfd = None
+
         # Make the stdout of the process non-blocking so the management and monitoring
         # code in this class can still run.
         if process.stdout is not None:
-            fl = fcntl.fcntl(process.stdout, fcntl.F_GETFL)
-            fcntl.fcntl(process.stdout, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+            os.set_blocking(process.stdout.fileno(), False)
+            try:
+                fcntl.fcntl(process.stdout, fcntl.F_SETPIPE_SZ, _OUTPUT_PIPE_SIZE)
+            except (AttributeError, OSError):
+                # Not supported by the OS or not allowed; the default size is used.
+                pass
 
         module_logger.info(
             f"New subprocess for command '{self.cmd}' started. "
@@ -253,31 +423,117 @@ A SIGTERM followed potentially by a SIGKILL will be sent to terminate the proces
         )
         return process
 
+    def _drain_output_until_exit(self, process: Popen[Any], timeout: float):
+        """
+        Wait for the process to exit, sending its remaining output to the logger.
+
+        The output is read while waiting, otherwise a process that is still writing
+        logs while shutting down could block on a full pipe and never exit.
+
+        :param process: The process to wait for.
+        :param timeout: The maximum number of seconds to wait.
+
+        :raises subprocess.TimeoutExpired: If the process doesn't exit in time.
+        """
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            self.register(selector)
+            try:
+                while (
+                    self._capture_output_line_from_process(process)
+                    != ProcessStatus.FINISHED_WITH_NO_MORE_LOGS
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        if process.poll() is None:
+                            raise subprocess.TimeoutExpired(process.args, timeout)
+                        # The process exited in time, so just finish reading its output.
+                        continue
+                    selector.select(timeout=min(remaining, 1))
+            finally:
+                self.unregister(selector)
+
+    def _close_stdout(self, process: Popen[Any]):
+        # A pipe at end of file is always readable, so we stop waiting on it, otherwise
+        # the selectors return immediately and the execution loop spins the CPU. From
+        # now on, only the exit of the process (or the timeout) wakes them up.
+        if process.stdout is None:
+            return
+        fd = process.stdout.fileno()
+        for selector in self._selectors:
+            if fd in selector.get_map():
+                selector.unregister(fd)
+        process.stdout.close()
+
+    def _close_pidfd(self):
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+            self._pidfd = None
+
     def _capture_output_line_from_process(self, process: Popen[Any]):
         """
         Read log lines from the Airflow process and upload them to CloudWatch.
 
+        All the output that is currently available is read at once, and every complete
+        line in it is sent to the logger.
+
         :param process: The process to read lines from.
 
         :return: The process status. See ProcessStatus enum for the possible values.
         """
-        line = b""
+        chunk = b""
         if process.stdout and not process.stdout.closed:
-            line = process.stdout.readline()
-        process_finished = process.poll() is not None
-        if line == b"" and process_finished:
-            return ProcessStatus.FINISHED_WITH_NO_MORE_LOGS
-        if line:
-            # Send the log to the logger.
-            self.process_logger.info(line.decode("utf-8"))
-            return (
-                ProcessStatus.FINISHED_WITH_LOG_READ
-                if process_finished
-                else ProcessStatus.RUNNING_WITH_LOG_READ
+            try:
+                chunk = os.read(process.stdout.fileno(), _OUTPUT_READ_CHUNK_SIZE)
+            except BlockingIOError:
+                # No output is available at the moment.
+                pass
+            else:
+                if not chunk:
+                    # End of file. The process closed its output, e.g. by redirecting
+                    # it to a file, but it might still be running.
+                    self._close_stdout(process)
+
+        # While the process is writing output, we don't check whether it has exited
+        # since, either way, we need to continue reading its output. We find out about
+        # its exit once there is no more output to read, saving a waitpid() system call
+        # for every chunk of output read.
+        process_finished = not chunk and process.poll() is not None
+
+        if not self.process_logger.isEnabledFor(logging.INFO):
+            # Nobody is interested in the output, so don't bother decoding it.
+            self._output_decoder.reset()
+            self._partial_output_line = ""
+            if process_finished:
+                return ProcessStatus.FINISHED_WITH_NO_MORE_LOGS
+            if chunk:
+                return ProcessStatus.RUNNING_WITH_LOG_READ
+            return ProcessStatus.RUNNING_WITH_NO_LOG_READ
+
+        if chunk:
+            text = self._partial_output_line + self._output_decoder.decode(chunk)
+            lines = text.split("\n")
+            self._partial_output_line = lines.pop()
+        elif process_finished:
+            # The process has exited, so flush whatever incomplete line is left.
+            text = self._partial_output_line + self._output_decoder.decode(
+                b"", final=True
             )
+            lines = [text] if text else []
+            self._partial_output_line = ""
         else:
             return ProcessStatus.RUNNING_WITH_NO_LOG_READ
 
+        if lines:
+            # Send the logs to the logger.
+            log = self.process_logger.info
+            for line in lines:
+                log(line)
+
+        if not chunk:
+            return ProcessStatus.FINISHED_WITH_NO_MORE_LOGS
+        return ProcessStatus.RUNNING_WITH_LOG_READ
+
     def _kill(self, process: Popen[Any]):
         # Do nothing if process has already terminated
         if process.poll() is not None:
@@ -291,11 +547,9 @@ A SIGTERM followed potentially by a SIGKILL will be sent to terminate the proces
                 f"Failed to send signal {signal.SIGTERM}. Sending SIGKILL..."
             )
             process.kill()
-        sigterm_patience_interval_secs = self.sigterm_patience_interval.total_seconds()
+        sigterm_patience_interval_secs = self._sigterm_patience_interval_secs
         try:
-            outs, _ = process.communicate(timeout=sigterm_patience_interval_secs)
-            if outs:
-                self.process_logger.info(outs.decode("utf-8"))
+            self._drain_output_until_exit(process, sigterm_patience_interval_secs)
         except subprocess.TimeoutExpired:
             module_logger.error(
                 f"Failed to kill {str(self)} with a SIGTERM signal. Process didn't "
@@ -306,6 +560,37 @@ A SIGTERM followed potentially by a SIGKILL will be sent to terminate the proces
         module_logger.info("Process killed. Return code %s" % process.returncode)
 
 
+@cache
+def _get_dual_logger(process_logger: logging.Logger) -> CompositeLogger:
+    """
+    Retrieve a logger that publishes to both, the given logger and the module logger.
+
+    Loggers live as long as the process does, so the composite logger is only created
+    once per process logger and shared by all subprocesses using it.
+
+    :param process_logger: The logger of the process.
+
+    :returns The composite logger.
+    """
+    return CompositeLogger(
+        "process_module_dual_logger",  # name can be anything unused.
+        # We deduplicate the loggers, keeping their order, to avoid double logging
+        # using the module logger if the user doesn't pass a logger.
+        *dict.fromkeys([process_logger, module_logger]),
+    )
+
+
+# The subprocesses that were started but not closed yet, which we close at exit. Weak
+# references are used so this doesn't keep subprocesses that are no longer used alive.
+_open_subprocesses: "weakref.WeakSet[Subprocess]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_subprocesses():
+    for s in list(_open_subprocesses):
+        s.close()
+
+
 def run_subprocesses(
     subprocesses: List[Subprocess], essential_subprocesses: List[Subprocess] = []
 ):
@@ -326,28 +611,47 @@ def run_subprocesses(
       if any of them fails, e.g. the scheduler container, which contains the scheduler,
       triggerer, and DAG processor.
     """
-    for s in subprocesses:
-        s.start(False)  # False since we want to run the subprocesses in parallel
-
-    read_some_logs = True
-    while len(subprocesses) > 0:
-        read_some_logs = False
-        finished_processes: List[Subprocess] = []
+    essential = set(essential_subprocesses)
+    with selectors.DefaultSelector() as selector:
+        running: Dict[int, Subprocess] = {}
         for s in subprocesses:
+            s.start(False)  # False since we want to run the subprocesses in parallel
+            s.register(selector)
+            running[s.process.pid] = s  # type: ignore
+
+        try:
+            _monitor_subprocesses(selector, running, essential)
+        finally:
+            # Don't leave the subprocesses registered with a selector that is closed.
+            for s in running.values():
+                s.unregister(selector)
+
+
+def _monitor_subprocesses(
+    selector: selectors.BaseSelector,
+    running: Dict[int, Subprocess],
+    essential: Set[Subprocess],
+):
+    """
+    Ingest the logs of the given running subprocesses until they all finish.
+
+    :param selector: The selector all the subprocesses are registered with.
+    :param running: The running subprocesses, keyed by their PID. Subprocesses are
+      removed from it as they finish.
+    :param essential: The subprocesses that must continue running, otherwise all
+      subprocesses are terminated.
+    """
+    ready: List[Subprocess] = list(running.values())
+    next_full_sweep = time.monotonic() + _FULL_SWEEP_INTERVAL_SECS
+    while running:
+        finished_essential_processes: List[Subprocess] = []
+        for s in ready:
+            pid = s.process.pid  # type: ignore
             if not s.execution_loop_iter():
-                finished_processes.append(s)
-            if s.process_status in [
-                ProcessStatus.FINISHED_WITH_LOG_READ,
-                ProcessStatus.RUNNING_WITH_LOG_READ,
-            ]:
-                read_some_logs = True
-
-        # Remove finished processes from the list of running processes.
-        subprocesses = [s for s in subprocesses if s not in finished_processes]
-
-        finished_essential_processes = [
-            s for s in finished_processes if s in essential_subprocesses
-        ]
+                s.unregister(selector)
+                del running[pid]
+                if s in essential:
+                    finished_essential_processes.append(s)
 
         if finished_essential_processes:
             names = [str(p) for p in finished_essential_processes]
@@ -355,11 +659,28 @@ def run_subprocesses(
                 f"The following essential process(es) exited: {', '.join(names)}. "
                 "Terminating other subprocesses..."
             )
-            for s in subprocesses:
+            for s in running.values():
+                s.unregister(selector)
                 s.stop()
             break
 
-        if not read_some_logs:
-            # We didn't read any logs from any process. Sleep for a bit so we don't
-            # enter into a tight loop that spikes the CPU.
-            time.sleep(1)
+        if not running:
+            break
+
+        # Wait until some process writes output or exits.
+        events = selector.select(timeout=max(next_full_sweep - time.monotonic(), 0))
+        now = time.monotonic()
+        if now >= next_full_sweep:
+            # Every second, we iterate over all processes, whether or not they have
+            # events, since not every exit wakes up the selector, e.g. if pidfds aren't
+            # supported and the output of the process is at its end or held open by a
+            # child of the process.
+            ready = list(running.values())
+            next_full_sweep = now + _FULL_SWEEP_INTERVAL_SECS
+            continue
+        ready = list(dict.fromkeys(key.data for key, _ in events))
+        # Processes whose conditions failed must be terminated even if they are
+        # quiet while others keep writing output.
+        ready += [
+            s for s in running.values() if s.conditions_failed and s not in ready
+        ]